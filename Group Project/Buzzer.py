@@ -83,6 +83,16 @@ class PassiveBuzzer(Buzzer):
         self._buz.duty_u16(0)
         self._playing = False
 
+    def gate(self, on):
+        """
+        Silence or resume the current tone by only changing the duty cycle.
+        The frequency set by the last play() is kept, so this is cheap enough
+        to call for fast on/off patterns. Call play() once first to set the tone.
+        """
+        
+        self._buz.duty_u16(self._volume * 100 if on else 0)
+        self._playing = on
+
     def setVolume(self, volume=5):
         """ Change the volume of the sound currently playing and future plays """
         
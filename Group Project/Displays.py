@@ -161,6 +161,23 @@ class LCDDisplay(Display):
         self._lcd.putstr(text)
         self._working = False
 
+    def writeFullScreen(self, buf):
+        """
+        Rewrite the whole display from one buffer - the first 16 characters
+        go on row 0 and the next 16 on row 1 (shorter rows are padded with
+        spaces). Each row is sent as a single block, so this is much cheaper
+        than clear() followed by a showText per row, and does not flash.
+        """
+        
+        if self._working:
+            Log.e("LCDDisplay - Display busy")
+            return
+        self._working = True
+        Log.i("LCDDisplay - showing screen %s", buf)
+        self._lcd.write_row(0, buf[:16])
+        self._lcd.write_row(1, buf[16:32])
+        self._working = False
+
     def addShape(self, position, shapearray):
         """
         Add a custom character at a position.
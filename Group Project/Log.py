@@ -11,6 +11,7 @@ Log.level = DEBUG  # set global log level
 Log.i(f'help')     # Info message: f-strings recommended for showing variables
 Log.d(f'value: {v}') # Debug message
 Log.e(f'Exception: {x}') # Error message
+Log.d('value: %s', v)  # Extra arguments are %-formatted only if the message is shown
 Log.name('Myproject') # Set a global project name
 """
 
@@ -28,19 +29,19 @@ class Log:
     level = ALL
 
     @classmethod
-    def i(cls, message):
+    def i(cls, message, *args):
         if (cls.level >= INFO):
-            Log.pr(message)
+            Log.pr(message % args if args else message)
 
     @classmethod
-    def d(cls, message):
+    def d(cls, message, *args):
         if (cls.level >= DEBUG):
-            Log.pr(message)
+            Log.pr(message % args if args else message)
 
     @classmethod
-    def e(cls, message):
+    def e(cls, message, *args):
         if (cls.level >= ERROR):
-            Log.pr(message)
+            Log.pr(message % args if args else message)
 
     @classmethod
     def pr(cls, message):
@@ -173,11 +173,16 @@ class CoolingFan(Motor):
         self.enable_pin.freq(1000)
         self.min_duty = min_duty
         self.max_duty = max_duty
+        self._duty_cache = {}  # speed -> scaled duty_u16 value
     
     def run(self, speed):
         Log.i(f"Running fan {self._name} at speed {speed}")
         self.speed = speed
-        self.enable_pin.duty_u16(self.duty_cycle(self.speed))
+        duty = self._duty_cache.get(speed)
+        if duty is None:
+            duty = self.duty_cycle(speed)
+            self._duty_cache[speed] = duty
+        self.enable_pin.duty_u16(duty)
         
     def stop(self):
         Log.i(f"Stopping fan {self._name}")
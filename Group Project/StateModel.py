@@ -49,7 +49,8 @@ class StateModel:
     stateLeft to perform actions as per the state model
 
     After creating the state, call addTransition to determine
-    how the model transitions from one state to the next.
+    how the model transitions from one state to the next, or call
+    loadTable to register the custom events and transitions in one go.
 
     As events start coming in, call processEvent on the event to
     have the state model transition as per the transition matrix.
@@ -73,15 +74,20 @@ class StateModel:
         
         self._numstates = numstates
         self._running = False
-        self._transitions = []
-        for i in range(0, numstates):
-            self._transitions.append(None)
+        self._transitions = [dict() for _ in range(numstates)]  # per state: event -> toState
+        self._has_no_event = [False] * numstates  # per state: is there a no_event transition
         self._curState = -1
         self._handler = handler
+        self._bindHandler()
         self._debug = debug
-        self._events = ['no_event']
+        self._events = {'no_event'}
         self._buttons = []
         self._timers = []
+        self._software_timers = []  # the subset of _timers that run() must ping
+        # Event names resolved once at registration: button/timer name -> event
+        self._press_events = {}
+        self._release_events = {}
+        self._timeout_events = {}
 
     def addTransition(self, fromState, events, toState):
         """
@@ -91,13 +97,30 @@ class StateModel:
         cause the same transition.
         """
 
+        if toState < 0 or toState >= self._numstates:
+            raise ValueError(f"Invalid state {toState}")
         for event in events:
             if event in self._events:
-                if not self._transitions[fromState]:
-                    self._transitions[fromState] = []
-                self._transitions[fromState].append((event,toState))
+                self._transitions[fromState][event] = toState
+                if event == 'no_event':
+                    self._has_no_event[fromState] = True
             else:
                 raise ValueError(f"Invalid event {event}")
+
+    def loadTable(self, events, transitions):
+        """
+        Register custom events and transitions from a table in a single call.
+        events is a sequence of custom event names (see addCustomEvent) and
+        transitions is a sequence of (fromState, event, toState) tuples.
+
+        For example:
+        loadTable(("go", "back"), ((0, "go", 1), (1, "back", 0)))
+        """
+
+        for event in events:
+            self.addCustomEvent(event)
+        for (fromState, event, toState) in transitions:
+            self.addTransition(fromState, [event], toState)
             
     def setTransitionTable(self, transitions):
         """
@@ -128,26 +151,39 @@ class StateModel:
             for (e,s) in row:
                 if e not in self._events:
                     raise ValueError(f"Invalid event {e}")
+                if s < 0 or s >= self._numstates:
+                    raise ValueError(f"Invalid state {s}")
 
-        self._transitions = transitions
+        self._transitions = [dict(row) for row in transitions]
+        self._has_no_event = ['no_event' in row for row in self._transitions]
 
     def getTransition(self, fromState, event):
         """
         Get the distination for this transition
         """
 
-        for (e,s) in self._transitions[fromState]:
-            if e == event:
-                return s
-        return -1
+        return self._transitions[fromState].get(event, -1)
         
     
     def start(self):
         """ start the state model - always starts at state 0 as the start state """
         
+        self._bindHandler()  # pick up any handler methods replaced since construction
         self._curState = 0
         self._running = True
-        self._handler.stateEntered(self._curState, "no_event")  # start the state model
+        self._on_enter(self._curState, "no_event")  # start the state model
+
+    def _bindHandler(self):
+        """
+        Resolve the handler methods once so the event and run loops
+        do not look them up on every call. Only stateEntered and stateLeft
+        are required; stateDo is needed only by run(), and stateEvent is optional.
+        """
+
+        self._on_enter = self._handler.stateEntered
+        self._on_leave = self._handler.stateLeft
+        self._on_do = getattr(self._handler, 'stateDo', None)
+        self._on_event = getattr(self._handler, 'stateEvent', None)
 
     def stop(self):
         """
@@ -156,7 +192,7 @@ class StateModel:
         """
     
         if self._running:
-            self._handler.stateLeft(self._curState, "no_event")
+            self._on_leave(self._curState, "no_event")
         self._running = False
         for b in self._buttons:
             b.setHandler(None)
@@ -174,12 +210,12 @@ class StateModel:
         
         if (newState < self._numstates):
             if self._debug:
-                Log.d(f"Going from State {self._curState} to State {newState} on event {event}")
-            self._handler.stateLeft(self._curState, event)
+                Log.d("Going from State %d to State %d on event %s", self._curState, newState, event)
+            self._on_leave(self._curState, event)
             self._curState = newState
-            self._handler.stateEntered(self._curState, event)
+            self._on_enter(self._curState, event)
 
-    def processEvent(self, event):
+    def processEvent(self, event, validate=False):
         """
         Get the model to process an event. The event should be one of the events defined
         at the top of the model class. Currently 4 button press and release events, and
@@ -187,24 +223,31 @@ class StateModel:
         incorporated in the main class, and processevent should be called when these handlers
         are triggered.
         
+        Events are validated when transitions are added, so an unknown event here
+        simply has no transition and is ignored. Pass validate=True to raise a
+        ValueError for an event that was never registered instead.
+
         I may try to improve this design a bit in the future, but for now this is how it is
         built.
         """
         
-        if (event in self._events):
-            
-            newstate = self.getTransition(self._curState, event)
-            if newstate >= 0:
-                if self._debug:
-                    Log.d(f"Processing event {event}")
-                self.gotoState(newstate, event)
-            else:
-                if self._debug:
-                    if event != "no_event":
-                        if not self._handler.stateEvent(self._curState, event):
-                            Log.d(f"Ignoring event {event}")                    
+        newstate = self._transitions[self._curState].get(event, -1)
+        if newstate >= 0:
+            # Same as gotoState, minus the range check - destinations are
+            # validated when the transitions are added
+            if self._debug:
+                Log.d("Processing event %s", event)
+                Log.d("Going from State %d to State %d on event %s", self._curState, newstate, event)
+            self._on_leave(self._curState, event)
+            self._curState = newstate
+            self._on_enter(newstate, event)
         else:
-            raise ValueError(f"Invalid event {event}")
+            if validate and event not in self._events:
+                raise ValueError(f"Invalid event {event}")
+            if self._debug:
+                if event != "no_event":
+                    if self._on_event is None or not self._on_event(self._curState, event):
+                        Log.d("Ignoring event %s", event)                    
 
     def run(self, delay=0.1):        
         # Start the model first
@@ -215,19 +258,19 @@ class StateModel:
             # that you need to perform for each state
             # Do not perform entry and exit actions here - those are separate
                         
-            self._handler.stateDo(self._curState)
+            self._on_do(self._curState)
 
             # Ping any software timer in the model
-            for timer in self._timers:
-                if type(timer).__name__ == 'SoftwareTimer':
-                    timer.check()
+            for timer in self._software_timers:
+                timer.check()
             
             # I suggest putting in a short wait so you are not overloading the poor Pico
             if delay > 0:
                 time.sleep(delay)
 
             # If there is any no_event transition, lets process that now
-            self.processEvent("no_event")
+            if self._has_no_event[self._curState]:
+                self.processEvent("no_event")
 
 
     def addButton(self, btn):
@@ -238,8 +281,10 @@ class StateModel:
         if event1 in self._events or event2 in self._events:
             raise ValueError(f'There is already a button with the name {btnname}')
         else:
-            self._events.append(event1)
-            self._events.append(event2)
+            self._events.add(event1)
+            self._events.add(event2)
+            self._press_events[btnname] = event1
+            self._release_events[btnname] = event2
             btn.setHandler(self)
             self._buttons.append(btn)            
 
@@ -249,7 +294,7 @@ class StateModel:
         that have been added using the addButton method.
         """
 
-        self.processEvent(f'{name}_press')
+        self.processEvent(self._press_events[name])
 
     def buttonReleased(self, name):
         """
@@ -257,7 +302,7 @@ class StateModel:
         As well as press or just want to do release events only.
         """
 
-        self.processEvent(f'{name}_release')
+        self.processEvent(self._release_events[name])
         
     def addTimer(self, timer):
         """
@@ -269,9 +314,12 @@ class StateModel:
         if eventname in self._events:
             raise ValueError(f'A timer with name {timer._name} already exists')
         else:
-            self._events.append(eventname)
+            self._events.add(eventname)
+            self._timeout_events[timer._name] = eventname
             timer.setHandler(self)
             self._timers.append(timer)
+            if type(timer).__name__ == 'SoftwareTimer':
+                self._software_timers.append(timer)
 
     def addCustomEvent(self, event):
         """
@@ -287,7 +335,7 @@ class StateModel:
         if event in self._events:
             raise ValueError(f'An event with the name {event} already exists')
         else:
-            self._events.append(event)
+            self._events.add(event)
         
     def timeout(self, name):
         """
@@ -296,5 +344,4 @@ class StateModel:
         to be processed by the transition table
         """
         
-        eventname = f'{name}_timeout'
-        self.processEvent(eventname)
+        self.processEvent(self._timeout_events[name])
@@ -1,29 +1,124 @@
 import time
+import array
+import gc
+import errno
+import micropython
+from micropython import const
+from time import ticks_ms, ticks_diff, ticks_add
 from machine import *
-from Displays import *
-from Lights import *
-from Motors import *
-from Buzzer import *
 from Log import *
-from StateModel import *
-from dht import *
-from LightStrip import *
+# Hardware and state model modules are imported in TemperatureFanControl.__init__
 
+# Set to 1 to trace state changes; 0 lets the compiler drop the debug logging
+_DEBUG = const(0)
+
+# Temperature thresholds (°C), folded to literals by the MicroPython compiler
+_FAN1_T = const(30)
+_FAN2_T = const(40)
+_CRITICAL_T = const(50)
+
+# Median filter window size and the index of the median once sorted
+_WINDOW = const(5)
+_MEDIAN = const(2)
+
+def threshold_level(thresholds, value):
+    """
+    Returns how many entries of the sorted thresholds tuple are <= value,
+    i.e. bisect_right - MicroPython does not ship the bisect module.
+    """
+    level = 0
+    for t in thresholds:
+        if value < t:
+            break
+        level += 1
+    return level
+
+# ---------------------------------------------------
+# DHT11 driver
+# ---------------------------------------------------
+@micropython.native
+def dht_read(pin, buf):
+    """
+    Reads the 5 raw bytes of a DHT11 frame into buf and returns the number of
+    bits received (40 on success). Unlike the stock dht module, IRQs stay
+    enabled during the 18 ms start pulse and are only disabled for the ~4 ms
+    data capture. The pin must be open-drain and idle high between reads.
+    """
+    for i in range(5):
+        buf[i] = 0
+    pin.value(0)       # Start pulse - IRQs still enabled
+    time.sleep_ms(18)
+    irq = disable_irq()
+    pin.value(1)       # Release the line for the sensor's response
+    n = 0
+    # Sensor answers with ~80 us low then ~80 us high before the data bits
+    if time_pulse_us(pin, 0, 200) >= 0 and time_pulse_us(pin, 1, 200) >= 0:
+        while n < 40:
+            # Each bit is ~50 us low followed by ~27 us (0) or ~70 us (1) high
+            t = time_pulse_us(pin, 1, 200)
+            if t < 0:
+                break
+            buf[n >> 3] = (buf[n >> 3] << 1) | (1 if t > 48 else 0)
+            n += 1
+    enable_irq(irq)
+    return n
+
+class DHT11Reader:
+    """
+    Drop-in replacement for dht.DHT11 (measure/temperature/humidity)
+    built on dht_read, so a reading does not block IRQs for the full
+    start pulse.
+    """
+
+    def __init__(self, pin):
+        self._pin = pin
+        self._pin.init(Pin.OPEN_DRAIN, Pin.PULL_UP, value=1)
+        self._buf = array.array('B', bytes(5))
+
+    def measure(self):
+        buf = self._buf
+        if dht_read(self._pin, buf) != 40:
+            raise OSError(errno.ETIMEDOUT)
+        if (buf[0] + buf[1] + buf[2] + buf[3]) & 0xFF != buf[4]:
+            raise OSError(errno.EIO)  # Checksum mismatch
+
+    def humidity(self):
+        return self._buf[0]
+
+    def temperature(self):
+        return self._buf[2]
 
 # ---------------------------------------------------
 # Temperature Sensor Class
 # ---------------------------------------------------
 class TemperatureSensor:
+    # Safety floor - the DHT11 must not be sampled more than once a second. Callers
+    # that poll on a schedule (TemperatureFanControl uses 2 s) should keep their
+    # period above this so every scheduled call gets a fresh reading.
+    MIN_INTERVAL_MS = 1000
+
     def __init__(self, pin=6):  
-        self.sensor = DHT11(Pin(pin))
+        self.sensor = DHT11Reader(Pin(pin))
+        self._last_ms = None    # ticks_ms() of the last measurement attempt
+        self._last_temp = None  # Temperature from the last successful measurement
 
     def read_temperature(self):
-        """Reads the temperature from the DHT11 sensor and returns the value in °C."""
+        """
+        Reads the temperature from the DHT11 sensor and returns the value in °C.
+        Calls within MIN_INTERVAL_MS of the last attempt return the cached value
+        instead of blocking on a new measurement. Failed attempts count too, so a
+        faulty sensor is not retried on every call.
+        """
+        now = ticks_ms()
+        if self._last_ms is not None and ticks_diff(now, self._last_ms) < self.MIN_INTERVAL_MS:
+            return self._last_temp
+        self._last_ms = now
         try:
             self.sensor.measure()  # Trigger a new reading
             temp = self.sensor.temperature()  # Get temperature (°C)
-            hum = self.sensor.humidity()  # Get humidity (%)
-            Log.i(f"Temperature: {temp}°C, Humidity: {hum}%")
+            if _DEBUG:  # Humidity is only of interest when debugging
+                Log.d(f"Temperature: {temp}°C, Humidity: {self.sensor.humidity()}%")
+            self._last_temp = temp
             return temp  # Return temperature only
         except OSError as e:
             Log.e("Error reading DHT11 sensor: " + str(e))
@@ -33,154 +128,240 @@ class TemperatureSensor:
 # Temperature Fan Control (using PassiveBuzzer with hazard sound)
 # ---------------------------------------------------
 class TemperatureFanControl:
+    # Event that jumps to each state from any other (indexed by target state)
+    TARGET_EVENTS = ("to_idle", "to_fan1", "to_both", "to_critical")
+
+    # Hardware setup for each state: (fan 1 duty, fan 2 duty, LED color, LCD label)
+    # Labels are at most 9 characters so "State: " + label fits a 16 character row
+    STATE_CONFIG = (
+        (0, 0, (0, 0, 255), "Idle"),          # Below 30°C: fans off, blue
+        (50, 0, (0, 255, 0), "Fan 1 On"),     # 30°C: Fan 1 at moderate speed, green
+        (75, 75, (255, 255, 0), "Both On"),   # 40°C: both fans faster, yellow
+        (75, 75, (255, 0, 0), "HIGH TEMP"),   # 50°C and above: critical, red
+    )
+
     def __init__(self):
         # Temperature thresholds
-        self.FAN1_THRESHOLD = 30      # Temperature (°C) to turn on Fan 1
-        self.FAN2_THRESHOLD = 40      # Temperature (°C) to turn on Fan 2 (both fans on)
-        self.CRITICAL_THRESHOLD = 50  # Temperature (°C) to trigger critical state
+        self.FAN1_THRESHOLD = _FAN1_T         # Temperature (°C) to turn on Fan 1
+        self.FAN2_THRESHOLD = _FAN2_T         # Temperature (°C) to turn on Fan 2 (both fans on)
+        self.CRITICAL_THRESHOLD = _CRITICAL_T # Temperature (°C) to trigger critical state
+        self.HYSTERESIS = 3           # Degrees (°C) below a threshold before stepping back down
+
+        # Hysteresis bands: _up[s] leaves state s upward, _down[s - 1] leaves state s downward
+        self._up = (self.FAN1_THRESHOLD, self.FAN2_THRESHOLD, self.CRITICAL_THRESHOLD)
+        self._down = tuple(t - self.HYSTERESIS for t in self._up)
 
-        # Initialize hardware components
+        # Initialize hardware components - each driver module is imported just
+        # before its first use, collecting garbage in between to keep peak heap low
+        from Displays import LCDDisplay
         self.lcd = LCDDisplay(sda=0, scl=1)
+        gc.collect()
+        from Motors import CoolingFan
         self.fan1 = CoolingFan(enable_pin=14, name="Fan 1")
         self.fan2 = CoolingFan(enable_pin=15, name="Fan 2")
+        gc.collect()
+        from LightStrip import LightStrip
         self.led_strip = LightStrip(pin=12, name="Temperature LED", numleds=8)
+        gc.collect()
         #  PassiveBuzzer here 
+        from Buzzer import PassiveBuzzer
         self.buzzer = PassiveBuzzer(pin=8, name="Warning Buzzer")
+        gc.collect()
         self.sensor = TemperatureSensor(pin=6)  # Real sensor
 
+        # Hazard beep pattern: current buzzer output and when it next flips
+        self.BEEP_PERIOD_MS = 100  # Time the buzzer stays on, then off
+        self._beep_on = False
+        self._beep_next_ms = 0
+
+        # Median filter over the last 5 readings to reject DHT11 noise spikes
+        self._window = array.array('b', [25] * _WINDOW)
+        self._wi = 0
+
+        # Text for each LCD row; both rows go out together in _flush_lcd, and
+        # only when one of them has changed since the last flush
+        self._lcd_row0 = ""
+        self._lcd_row1 = ""
+        self._lcd_dirty = False
+        self._last_temp_shown = None   # Temperature / state those rows were built from
+        self._last_state_shown = None
+
+        # Last color sent to the LED strip, so unchanged colors are not rewritten
+        self._last_color = None
+
+        # Last duty set on each fan, so unchanged duties do not reprogram the PWM.
+        # None until first written, so the first state entry always sets the fans.
+        self._fan1_duty = None
+        self._fan2_duty = None
+
+        # Each subsystem runs on its own deadline instead of every tick:
+        # sensor every 2 s, LCD every 500 ms (the beep keeps its own 100 ms edges)
+        self.SENSOR_PERIOD_MS = 2000
+        self.LCD_PERIOD_MS = 500
+        self._temperature = 25
+        self._filtered = 25
+        now = ticks_ms()
+        self._next_sensor_ms = now
+        self._next_lcd_ms = now
+
         # Initialize the StateModel with 4 states (0, 1, 2, 3)
-        self._model = StateModel(4, self, debug=True)
-
-        # Register custom events
-        self._model.addCustomEvent("fan1_on")
-        self._model.addCustomEvent("both_fans_on")
-        self._model.addCustomEvent("critical_temp")
-        self._model.addCustomEvent("temp_drop")
-
-        # Define upward transitions:
-        #   0 (Idle) --[fan1_on]--> 1 (Fan 1 On)
-        #   1 (Fan 1 On) --[both_fans_on]--> 2 (Both Fans On)
-        #   2 (Both Fans On) --[critical_temp]--> 3 (Critical)
-        self._model.addTransition(0, ["fan1_on"], 1)
-        self._model.addTransition(1, ["both_fans_on"], 2)
-        self._model.addTransition(2, ["critical_temp"], 3)
-
-        # Define downward transitions:
-        #   3 (Critical) --[temp_drop]--> 2 (Both Fans On)
-        #   2 (Both Fans On) --[temp_drop]--> 1 (Fan 1 On)
-        #   1 (Fan 1 On) --[temp_drop]--> 0 (Idle)
-        self._model.addTransition(3, ["temp_drop"], 2)
-        self._model.addTransition(2, ["temp_drop"], 1)
-        self._model.addTransition(1, ["temp_drop"], 0)
+        from StateModel import StateModel
+        self._model = StateModel(4, self, debug=_DEBUG)
+
+        # States are chosen from the temperature, so every state can jump
+        # directly to any other on that target's event:
+        #   any state --[to_idle]--> 0 (Idle)
+        #   any state --[to_fan1]--> 1 (Fan 1 On)
+        #   any state --[to_both]--> 2 (Both Fans On)
+        #   any state --[to_critical]--> 3 (Critical)
+        self._model.loadTable(
+            events=self.TARGET_EVENTS,
+            transitions=tuple((fromState, event, toState)
+                              for (toState, event) in enumerate(self.TARGET_EVENTS)
+                              for fromState in range(4) if fromState != toState))
 
     def read_temperature(self):
         """Fetches the temperature from the DHT11 sensor."""
         temp = self.sensor.read_temperature()
         return temp if temp is not None else 25  # Default to 25°C if error
 
-    def update_system(self):
-        """Determines the desired state based on temperature and triggers state transitions."""
+    def _sample_temperature(self):
+        """Reads the sensor and pushes the reading into the median filter."""
         temperature = self.read_temperature()
-        Log.i(f"Current Temperature: {temperature}°C")
-        
-        # Update the LCD with the current temperature.
-        self.lcd.clear()
-        self.lcd.showText(f"Temp: {temperature}C", row=0, col=0)
-
-        # Determine the desired state based on temperature:
-        #   State 0: below 30°C, State 1: 30°C-39°C, State 2: 40°C-49°C, State 3: 50°C and above
-        if temperature >= self.CRITICAL_THRESHOLD:
-            desired_state = 3
-        elif temperature >= self.FAN2_THRESHOLD:
-            desired_state = 2
-        elif temperature >= self.FAN1_THRESHOLD:
-            desired_state = 1
-        else:
-            desired_state = 0
+        Log.i("Current Temperature: %s°C", temperature)
+        self._temperature = temperature
+
+        # Threshold on the median of the recent readings, not the raw value
+        self._window[self._wi] = int(temperature)
+        self._wi = (self._wi + 1) % _WINDOW
+        self._filtered = sorted(self._window)[_MEDIAN]
+
+    def _update_lcd(self):
+        """Updates the LCD with the current temperature, if it has changed."""
+        if self._temperature != self._last_temp_shown:
+            self._set_row(0, f"Temp: {self._temperature}C")
+            self._last_temp_shown = self._temperature
+
+    def _evaluate_state(self):
+        """Determines the desired state based on temperature and triggers state transitions."""
+        filtered = self._filtered
+        model = self._model
 
         # Get the current state from the state model.
-        current_state = self._model._curState  # (Assuming direct access to _curState)
-
-        # Transition upward 
-        while current_state < desired_state:
-            if current_state == 0:
-                self._model.processEvent("fan1_on")
-            elif current_state == 1:
-                self._model.processEvent("both_fans_on")
-            elif current_state == 2:
-                self._model.processEvent("critical_temp")
-            current_state = self._model._curState  # Update current state
-
-        # Transition downward 
-        while current_state > desired_state:
-            self._model.processEvent("temp_drop")
-            current_state = self._model._curState  # Update current state
+        current_state = model._curState  # (Assuming direct access to _curState)
+
+        # Determine the desired state using the hysteresis bands:
+        #   Go up at 30°C/40°C/50°C, come back down below 27°C/37°C/47°C.
+        desired_state = threshold_level(self._up, filtered)
+        if desired_state <= current_state:
+            desired_state = threshold_level(self._down, filtered)
+            if desired_state >= current_state:
+                return  # Steady state - nothing to hand to the state model
+
+        # Jump straight to the desired state, skipping intermediate states
+        model.processEvent(self.TARGET_EVENTS[desired_state])
+
+    def _set_row(self, row, text):
+        """Sets the text for an LCD row; it is shown on the next _flush_lcd."""
+        attr = "_lcd_row0" if row == 0 else "_lcd_row1"
+        if getattr(self, attr) == text:
+            return
+        setattr(self, attr, text)
+        self._lcd_dirty = True
+
+    def _flush_lcd(self):
+        """Writes both LCD rows in one screen update, if either has changed."""
+        if self._lcd_dirty:
+            self.lcd.writeFullScreen(f"{self._lcd_row0:<16.16}{self._lcd_row1:<16.16}")
+            self._lcd_dirty = False
+
+    def _set_led(self, color):
+        """Sets the LED strip color, skipping the WS2812 refresh if it already shows it."""
+        if color != self._last_color:
+            self.led_strip.setColor(color)
+            self._last_color = color
+
+    def _set_fan(self, fan, attr, duty):
+        """Runs a fan at duty (0 stops it), skipping the PWM write if it is already there."""
+        if getattr(self, attr) != duty:
+            if duty:
+                fan.run(duty)
+            else:
+                fan.stop()
+            setattr(self, attr, duty)
 
     def warning_beep(self):
         """
         Implements a hazard sound pattern:
-        The buzzer will be on for 300 ms and off for 300 ms in a continuous loop.
+        The buzzer will be on for 100 ms and off for 100 ms in a continuous loop.
+        The 1 kHz tone is set up once in stateEntered; here the buzzer is only
+        gated on the on/off edges, not reconfigured on every call.
         """
-        current_time = time.ticks_ms()
-        
-        if (current_time % 200) < 100:
-            self.buzzer.play(tone=1000)  # Play a 1 kHz tone 
-        else:
-            self.buzzer.stop()
+        now = ticks_ms()
+        if ticks_diff(now, self._beep_next_ms) >= 0:
+            self._beep_on = not self._beep_on
+            self.buzzer.gate(self._beep_on)
+            self._beep_next_ms = ticks_add(now, self.BEEP_PERIOD_MS)
 
     def stateEvent(self, state, event):
         """Called when an in-state event occurs (if needed)."""
-        Log.d(f"State {state}: Processing event {event}")
+        if _DEBUG:
+            Log.d(f"State {state}: Processing event {event}")
 
     def stateEntered(self, state, event):
         """Called when entering a new state; sets up the hardware accordingly."""
-        Log.d(f"Entered State {state} on event {event}")
+        if _DEBUG:
+            Log.d(f"Entered State {state} on event {event}")
+        self._apply_hardware_for_state(state)
+
+    def _apply_hardware_for_state(self, state):
+        """
+        Sets the fans, LED, LCD and buzzer for a state. It does not depend on
+        the previous state, so states can be entered directly from any other.
+        """
+        fan1_duty, fan2_duty, color, label = self.STATE_CONFIG[state]
+        set_fan = self._set_fan
+        set_fan(self.fan1, '_fan1_duty', fan1_duty)
+        set_fan(self.fan2, '_fan2_duty', fan2_duty)
+        self._set_led(color)
+        if state != self._last_state_shown:
+            self._set_row(1, "State: " + label)
+            self._last_state_shown = state
         if state == 0:
-            # Idle: Turn off fans and buzzer, set LED to blue.
-            self.fan1.stop()
-            self.fan2.stop()
             self.buzzer.stop()
-            self.led_strip.setColor((0, 0, 255))  # Blue
-            self.lcd.showText("State: Idle", row=1, col=0)
-        elif state == 1:
-            # 30°C: Turn on Fan 1 at moderate speed, LED green.
-            self.fan1.run(50)
-            self.led_strip.setColor((0, 255, 0))  # Green
-            self.lcd.showText("State: Fan 1 On", row=1, col=0)
-        elif state == 2:
-            # 40°C: Run both fans at higher speed, LED yellow.
-            self.fan1.run(75)
-            self.fan2.run(75)
-            self.led_strip.setColor((255, 255, 0))  # Yellow
-            self.lcd.showText("State: Both Fans On", row=1, col=0)
         elif state == 3:
-            # 50°C and above: Critical state.
-            # Run both fans and prepare the hazard tone.
-            self.fan1.run(75)
-            self.fan2.run(75)
-            # Do not call buzzer.play() here; let the hazard pattern in stateDo handle it.
-            self.buzzer.stop()  # Ensure the buzzer is off before the hazard pattern takes over.
-            self.led_strip.setColor((255, 0, 0))  # Red
-            self.lcd.showText("State: Warning! High Temp", row=1, col=0)
+            # Start the 1 kHz tone once; the hazard pattern in stateDo then only gates it.
+            self.buzzer.play(tone=1000)
+            self._beep_on = True
+            self._beep_next_ms = ticks_add(ticks_ms(), self.BEEP_PERIOD_MS)
 
     def stateLeft(self, state, event):
         """Called when leaving a state; performs cleanup as needed."""
-        Log.d(f"Left State {state} on event {event}")
+        if _DEBUG:
+            Log.d(f"Left State {state} on event {event}")
         if state == 3:
             self.buzzer.stop()
-        if state == 2 and event != "critical_temp":
-            self.fan2.stop()
-        if state == 1:
-            self.fan1.stop()
+            self._beep_on = False
+        # Fans are left as they are - the next state's entry sets them
 
     def stateDo(self, state):
         """
         This method is called repeatedly in the state’s execution loop.
         If in the critical state, it continuously runs the hazard beep pattern.
+        The sensor and LCD are only serviced when their deadlines come due, so
+        a DHT11 read never delays a beep edge by more than one tick.
         """
         if state == 3:
             self.warning_beep()
-        self.update_system()
+        now = ticks_ms()
+        if ticks_diff(now, self._next_sensor_ms) >= 0:
+            self._next_sensor_ms = ticks_add(now, self.SENSOR_PERIOD_MS)
+            self._sample_temperature()
+            self._evaluate_state()
+        if ticks_diff(now, self._next_lcd_ms) >= 0:
+            self._next_lcd_ms = ticks_add(now, self.LCD_PERIOD_MS)
+            self._update_lcd()
+            self._flush_lcd()
 
     def run(self):
         """Starts the state model loop."""
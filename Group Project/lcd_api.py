@@ -160,6 +160,18 @@ class LcdApi:
         for char in string:
             self.putchar(char)
 
+    def write_row(self, row, string):
+        """Overwrite a whole row with the indicated string, padded with
+        spaces or cut to the display width. The characters go out as one
+        block of data instead of one write (and cursor move) per character,
+        and the cursor ends up at the start of the next row, as putstr would
+        leave it. The string should not contain newlines.
+        """
+        self.move_to(0, row)
+        text = (string + ' ' * self.num_columns)[:self.num_columns]
+        self.hal_write_data_block(bytes([ord(c) & 0xff for c in text]))
+        self.move_to(0, (row + 1) % self.num_lines)
+
     def custom_char(self, location, charmap):
         """Write a character to one of the 8 CGRAM locations, available
         as chr(0) through chr(7).
@@ -198,6 +210,13 @@ class LcdApi:
         """
         raise NotImplementedError
 
+    def hal_write_data_block(self, data):
+        """Write a sequence of data bytes to the LCD.
+        A derived HAL class can override this with a faster bulk transfer.
+        """
+        for byte in data:
+            self.hal_write_data(byte)
+
     def hal_sleep_us(self, usecs):
         """Sleep for some time (given in microseconds)."""
         time.sleep_us(usecs)
\ No newline at end of file
@@ -86,4 +86,21 @@ class I2cLcd(LcdApi):
                 ((data & 0x0f) << SHIFT_DATA))      
         self.i2c.writeto(self.i2c_addr, bytes([byte | MASK_E]))
         self.i2c.writeto(self.i2c_addr, bytes([byte]))
+        gc.collect()
+
+    def hal_write_data_block(self, data):
+        # Write several data bytes in one I2C transaction. The PCF8574 latches
+        # each byte in turn, so the E pulses are streamed in a single buffer.
+        base = MASK_RS | (self.backlight << SHIFT_BACKLIGHT)
+        buf = bytearray(4 * len(data))
+        i = 0
+        for d in data:
+            hi = base | (((d >> 4) & 0x0f) << SHIFT_DATA)
+            lo = base | ((d & 0x0f) << SHIFT_DATA)
+            buf[i] = hi | MASK_E
+            buf[i + 1] = hi
+            buf[i + 2] = lo | MASK_E
+            buf[i + 3] = lo
+            i += 4
+        self.i2c.writeto(self.i2c_addr, buf)
         gc.collect()
\ No newline at end of file
@@ -1,81 +1,7 @@
-class TemperatureSensor:
-    """Handles basic temperature sensor functionality."""
-    def __init__(self, sensor_pin: int):
-        self.sensor_pin = sensor_pin  # TODO: Initialize sensor
-
-    def read_temperature(self) -> float:
-        # TODO: Return the sensor's temperature reading
-        return 25.0  # Placeholder
-
-
-class Fan:
-    """Handles basic fan control (on/off or speed)."""
-    def __init__(self, fan_pin: int):
-        self.fan_pin = fan_pin  # TODO: Initialize fan pin/PWM
-
-    def turn_on(self):
-        # TODO: Implement fan on logic
-        pass
-
-    def turn_off(self):
-        # TODO: Implement fan off logic
-        pass
-
-    def set_speed(self, speed: int):
-        # TODO: Implement PWM speed control
-        pass
-
-
-class TemperatureController:
-    """Controls the fan based on temperature readings."""
-    def __init__(self, temp_sensor: TemperatureSensor, fan: Fan, threshold: float = 25.0):
-        self.temp_sensor = temp_sensor
-        self.fan = fan
-        self.threshold = threshold
-
-    def set_threshold(self, threshold: float):
-        self.threshold = threshold
-
-    def control_fan(self):
-        # TODO: Compare sensor reading to threshold and control fan
-        pass
-
-
-class LCDDisplay:
-    """Handles basic LCD display functionality."""
-    def __init__(self, i2c_address: int = 0x27, rows: int = 2, columns: int = 16):
-        self.i2c_address = i2c_address
-        self.rows = rows
-        self.columns = columns
-        # TODO: Initialize LCD
-
-    def clear(self):
-        # TODO: Clear LCD screen
-        pass
-
-    def write_text(self, text: str, row: int = 0, col: int = 0):
-        # TODO: Write text to LCD
-        pass
-
-
-class Logger:
-    """Provides basic logging capabilities."""
-    def __init__(self):
-        # TODO: Initialize logger
-        pass
-
-    def log_info(self, message: str):
-        # TODO: Implement info logging
-        pass
-
-    def log_error(self, message: str):
-        # TODO: Implement error logging
-        pass
-
-
 def main():
-    # TODO: Create instances and run the control loop
-    pass
+    # Imported here so nothing is loaded until the controller actually starts
+    from TemperatureFanControl import TemperatureFanControl
+    TemperatureFanControl().run()
 
 
 if __name__ == "__main__":